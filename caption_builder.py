@@ -20,10 +20,23 @@ Note ❗: If the link is not working, copy it and paste into your browser.
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from bot.utils.file_parser import MovieMeta
 
+# Shared, immutable caption layout — filled with str.format_map per post
+_TEMPLATE = (
+    "🎬 <b>Title</b>: {title}\n"
+    "📅 <b>Year</b>  : {year}\n"
+    "📀 <b>Quality</b>: {quality}\n"
+    "🎧 <b>Audio</b>: {audio}\n\n"
+    "🔺 <b>Telegram File</b> 🔻\n\n"
+    "{files}\n\n"
+    "📦 <b>Get all files in one link:</b>\n"
+    "<code>{link}</code>\n\n"
+    "Note ❗: If the link is not working, copy it and paste into your browser."
+)
+
 
 def build_caption(
     qualities: List[MovieMeta],
@@ -47,47 +60,23 @@ def build_caption(
 
     # Use first meta as representative for header fields
     rep = qualities[0]
-    movie_title = title or rep.title
-    movie_year  = year  or rep.year
-
-    # Collect unique qualities for the header line
-    quality_set = _unique_ordered([m.quality for m in qualities if m.quality])
-    quality_str = " | ".join(quality_set) if quality_set else "—"
-
-    # Collect all unique audio langs across qualities
-    all_langs: List[str] = []
-    for m in qualities:
-        for lang in m.audio_langs:
-            if lang not in all_langs:
-                all_langs.append(lang)
-    lang_str = " + ".join(all_langs) if all_langs else "—"
-
-    lines: List[str] = [
-        f"🎬 <b>Title</b>: {movie_title}",
-        f"📅 <b>Year</b>  : {movie_year or '—'}",
-        f"📀 <b>Quality</b>: {quality_str}",
-        f"🎧 <b>Audio</b>: {lang_str}",
-        "",
-        "🔺 <b>Telegram File</b> 🔻",
-        "",
-    ]
 
-    for meta in qualities:
-        # ── KEY CHANGE ────────────────────────────────────────────────────────
-        # Use the EXACT caption the uploader typed when sending the file.
-        # Fall back to auto-reconstructed filename only if caption was empty.
-        caption_line = getattr(meta, "file_caption", None) or meta.caption_filename()
-        lines.append(f"♨️ {caption_line}")
-
-    lines += [
-        "",
-        "📦 <b>Get all files in one link:</b>",
-        f"<code>{group_deep_link}</code>",
-        "",
-        "Note ❗: If the link is not working, copy it and paste into your browser.",
+    # ── KEY CHANGE ────────────────────────────────────────────────────────────
+    # Use the EXACT caption the uploader typed when sending the file.
+    # Fall back to auto-reconstructed filename only if caption was empty.
+    file_lines = [
+        render_quality_line(getattr(m, "file_caption", None) or m.caption_filename())
+        for m in qualities
     ]
 
-    return "\n".join(lines)
+    return _render_caption(
+        title or rep.title,
+        year or rep.year,
+        (m.quality for m in qualities),
+        (lang for m in qualities for lang in m.audio_langs),
+        file_lines,
+        group_deep_link,
+    )
 
 
 def build_caption_from_docs(
@@ -98,40 +87,60 @@ def build_caption_from_docs(
 ) -> str:
     """
     Builds caption from raw MongoDB quality dicts.
-    Uses the stored 'file_caption' field — the exact uploader caption.
-    Falls back to auto-reconstruction if field is missing.
+    Uses the stored 'rendered_line' (the ♨️ line rendered once at insert);
+    older docs without it are rendered from 'file_caption' / the parsed
+    fields instead.
     """
-    metas = [_doc_to_meta(d) for d in quality_docs]
-    return build_caption(metas, group_deep_link, title=title, year=year)
+    if not quality_docs:
+        return ""
+
+    rep = quality_docs[0]
+    file_lines = [
+        d.get("rendered_line")
+        or render_quality_line(d.get("file_caption") or MovieMeta.from_doc(d).caption_filename())
+        for d in quality_docs
+    ]
+
+    return _render_caption(
+        title or rep.get("title", ""),
+        year or rep.get("year"),
+        (d.get("quality", "") for d in quality_docs),
+        (lang for d in quality_docs for lang in d.get("audio_langs", [])),
+        file_lines,
+        group_deep_link,
+    )
+
+
+def render_quality_line(file_caption: str) -> str:
+    """The ♨️ line for one file; stored per quality as 'rendered_line'."""
+    return f"♨️ {file_caption}"
 
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
-def _unique_ordered(lst: List[str]) -> List[str]:
-    seen = set()
-    result = []
-    for item in lst:
-        if item not in seen:
-            seen.add(item)
-            result.append(item)
-    return result
-
-
-def _doc_to_meta(doc: Dict[str, Any]) -> MovieMeta:
-    """Reconstruct a MovieMeta from a stored quality dict."""
-    from bot.utils.file_parser import MovieMeta  # local import avoids circulars
-    m = MovieMeta(raw_filename=doc.get("raw_filename", ""))
-    m.title           = doc.get("title", "")
-    m.year            = doc.get("year")
-    m.quality         = doc.get("quality", "")
-    m.resolution      = doc.get("resolution", "")
-    m.codec           = doc.get("codec", "")
-    m.audio_langs     = doc.get("audio_langs", [])
-    m.audio_format    = doc.get("audio_format", "")
-    m.audio_bitrate   = doc.get("audio_bitrate", "")
-    m.file_size_bytes = doc.get("file_size_bytes", 0)
-    m.has_esub        = doc.get("has_esub", False)
-    m.extension       = doc.get("extension", "mkv")
-    # ↓ The actual caption the uploader typed — the most important field now
-    m.file_caption    = doc.get("file_caption", "")
-    return m
+def _render_caption(
+    movie_title: str,
+    movie_year: Optional[int],
+    qualities: Iterable[str],
+    langs: Iterable[str],
+    file_lines: List[str],
+    group_deep_link: str,
+) -> str:
+    # Collect unique qualities for the header line
+    quality_set = list(dict.fromkeys(q for q in qualities if q))
+    quality_str = " | ".join(quality_set) if quality_set else "—"
+
+    # Collect all unique audio langs across qualities
+    all_langs = list(dict.fromkeys(langs))
+    lang_str = " + ".join(all_langs) if all_langs else "—"
+
+    return _TEMPLATE.format_map(
+        {
+            "title": movie_title,
+            "year": movie_year or "—",
+            "quality": quality_str,
+            "audio": lang_str,
+            "files": "\n".join(file_lines),
+            "link": group_deep_link,
+        }
+    )
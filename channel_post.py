@@ -21,15 +21,23 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
+from collections import OrderedDict
 from typing import Optional
 
+from pymongo import UpdateOne
+from pymongo.errors import ConnectionFailure
 from pyrogram import Client, filters
 from pyrogram.enums import ChatType, MessageMediaType
 from pyrogram.types import Message
 
 from bot.client import app
 from bot.database.mongo import Database
-from bot.utils.caption_builder import build_caption, build_caption_from_docs
+from bot.utils.caption_builder import (
+    build_caption,
+    build_caption_from_docs,
+    render_quality_line,
+)
 from bot.utils.file_parser import MovieMeta, parse_filename
 from bot.utils.link_generator import build_deep_link, generate_group_id
 from bot.utils.tmdb import tmdb
@@ -37,17 +45,94 @@ from config import settings
 
 logger = logging.getLogger(__name__)
 
-# Track in-flight grouping timers:  movie_key → asyncio.Task
-_pending_timers: dict[str, asyncio.Task] = {}
+# Track in-flight grouping timers:  movie_key → asyncio.TimerHandle
+# A bare call_later handle is cheaper to re-arm than a sleeping Task.
+_pending_handles: dict[str, asyncio.TimerHandle] = {}
+
+# Strong references to background tasks so they can't be collected mid-flight
+_bg_tasks: set[asyncio.Task] = set()
+
+# Upserts buffered during the grouping window, flushed in one bulk_write
+# by _flush_and_post:  movie_key → [UpdateOne, …]
+_pending_ops: dict[str, list[UpdateOne]] = {}
+
+# group_id / poster picked for a movie whose first upsert is still buffered,
+# so later files in the same burst don't mint a new id or re-query TMDB.
+# Registered before the TMDB await, so concurrent handlers wait on the
+# poster future instead of racing to create their own head.
+_pending_heads: dict[str, tuple[str, asyncio.Future[str]]] = {}
+
+# Failed flushes per movie; only connection errors are retried, and at most
+# FLUSH_MAX_RETRIES times before the batch is dropped
+FLUSH_MAX_RETRIES = 3
+_flush_attempts: dict[str, int] = {}
+
+# Short-lived movie docs so a burst of files doesn't re-query MongoDB for
+# every quality:  movie_key → (fetched_at, doc), oldest first
+CACHE_TTL = settings.GROUP_WAIT_SECONDS * 2
+CACHE_MAX_ENTRIES = 1024
+_movie_cache: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+# Lookups currently on the wire, shared by concurrent files of one movie
+_movie_inflight: dict[str, asyncio.Future] = {}
+
+
+# ── Cache helpers ──────────────────────────────────────────────────────────────
+
+async def _cached_get_movie(movie_key: str) -> Optional[dict]:
+    """Database.get_movie() with an in-process TTL + LRU cache."""
+    hit = _movie_cache.get(movie_key)
+    if hit and time.monotonic() - hit[0] < CACHE_TTL:
+        _movie_cache.move_to_end(movie_key)
+        return hit[1]
+
+    inflight = _movie_inflight.get(movie_key)
+    if inflight is not None:
+        # shield: a cancelled waiter must not cancel the shared lookup
+        return await asyncio.shield(inflight)
+
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    _movie_inflight[movie_key] = fut
+    try:
+        doc = await Database.get_movie(movie_key)
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as exc:
+        fut.set_exception(exc)
+        fut.exception()          # mark retrieved when nobody was waiting
+        raise
+    else:
+        fut.set_result(doc)
+    finally:
+        _movie_inflight.pop(movie_key, None)
+
+    if doc is None:
+        _movie_cache.pop(movie_key, None)
+        return None
+
+    _movie_cache[movie_key] = (time.monotonic(), doc)
+    _movie_cache.move_to_end(movie_key)
+    if len(_movie_cache) > CACHE_MAX_ENTRIES:
+        _movie_cache.popitem(last=False)
+    return doc
+
+
+def _invalidate_movie(movie_key: str) -> None:
+    _movie_cache.pop(movie_key, None)
 
 
 # ── Filter helper ──────────────────────────────────────────────────────────────
 
+# SOURCE_CHANNEL is either a numeric chat id or an @username — resolve once
+_SRC = str(settings.SOURCE_CHANNEL)
+_SRC_ID: Optional[int] = int(_SRC) if _SRC.lstrip("-").isdigit() else None
+_SRC_NAME: str = _SRC.lstrip("@")
+
+
 def _is_source_channel(_, __, message: Message) -> bool:
     """Return True only for messages from SOURCE_CHANNEL."""
-    cid = str(message.chat.id)
-    src = str(settings.SOURCE_CHANNEL)
-    return cid == src or message.chat.username == src.lstrip("@")
+    chat = message.chat
+    return chat.id == _SRC_ID or chat.username == _SRC_NAME
 
 
 source_channel_filter = filters.create(_is_source_channel)
@@ -73,12 +158,9 @@ async def _process_file(client: Client, message: Message) -> None:
     if media is None:
         return
 
-    filename: str = (
-        getattr(media, "file_name", None)
-        or getattr(media, "mime_type", "unknown")
-        or "unknown"
-    )
-    file_size: int      = getattr(media, "file_size", 0) or 0
+    # Video and Document both define these fields, so read them directly
+    filename: str       = media.file_name or media.mime_type or "unknown"
+    file_size: int      = media.file_size or 0
     file_unique_id: str = media.file_unique_id
     file_id: str        = media.file_id
 
@@ -100,13 +182,16 @@ async def _process_file(client: Client, message: Message) -> None:
     logger.info("Parsed → title='%s', year=%s, key='%s'", meta.title, meta.year, movie_key)
 
     # ── 3. Quality document (stored in DB per file) ───────────────────────────
+    # ↓ This is the key change — store the ACTUAL caption from the uploader.
+    # If no caption was provided, fall back to the auto-generated filename.
+    line_caption = file_caption if file_caption else meta.caption_filename()
     quality_doc = {
         "file_id":        file_id,
         "file_unique_id": file_unique_id,
         "raw_filename":   filename,
-        # ↓ This is the key change — store the ACTUAL caption from the uploader.
-        # If no caption was provided, fall back to the auto-generated filename.
-        "file_caption":   file_caption if file_caption else meta.caption_filename(),
+        "file_caption":   line_caption,
+        # ♨️ line rendered once here; caption rebuilds just join these
+        "rendered_line":  render_quality_line(line_caption),
         "title":          meta.title,
         "year":           meta.year,
         "quality":        meta.quality,
@@ -121,65 +206,108 @@ async def _process_file(client: Client, message: Message) -> None:
     }
 
     # ── 4. Check existing movie record ────────────────────────────────────────
-    existing = await Database.get_movie(movie_key)
+    # A pending head means the first upsert is still buffered, so there is no
+    # doc in MongoDB yet — skip the lookup for the rest of the burst
+    existing = None
+    if movie_key not in _pending_heads:
+        existing = await _cached_get_movie(movie_key)
 
     if existing:
         group_id       = existing["group_id"]
         poster_url     = existing.get("poster_url", settings.FALLBACK_POSTER)
         dest_message_id= existing.get("dest_message_id")
+    elif movie_key in _pending_heads:
+        # Earlier file of this burst is still buffered — reuse its choices
+        group_id, poster = _pending_heads[movie_key]
+        poster_url = await asyncio.shield(poster)
     else:
         # First encounter — generate group_id and fetch poster
         group_id = generate_group_id(movie_key)
-        poster_url, _, _ = await tmdb.search_movie(meta.title, meta.year)
-
-    deep_link = build_deep_link(group_id)
-
-    # ── 5. Upsert DB ─────────────────────────────────────────────────────────
-    doc = await Database.upsert_movie(
-        movie_key=movie_key,
-        title=meta.title,
-        year=meta.year,
-        group_id=group_id,
-        new_quality=quality_doc,
-        dest_message_id=existing.get("dest_message_id") if existing else None,
-        poster_url=poster_url,
+        poster = asyncio.get_running_loop().create_future()
+        _pending_heads[movie_key] = (group_id, poster)
+        poster_url = settings.FALLBACK_POSTER
+        try:
+            poster_url, _, _ = await tmdb.search_movie_cached(meta.title, meta.year)
+        finally:
+            # Waiters fall back to the default poster if the lookup failed
+            poster.set_result(poster_url)
+
+    # ── 5. Buffer the upsert (flushed once per movie in _flush_and_post) ─────
+    _pending_ops.setdefault(movie_key, []).append(
+        Database.upsert_movie_op(
+            movie_key=movie_key,
+            title=meta.title,
+            year=meta.year,
+            group_id=group_id,
+            new_quality=quality_doc,
+            dest_message_id=existing.get("dest_message_id") if existing else None,
+            poster_url=poster_url,
+        )
     )
 
     # ── 6. Cancel existing timer for this movie (new file arrived) ────────────
-    if movie_key in _pending_timers:
-        _pending_timers[movie_key].cancel()
+    handle = _pending_handles.pop(movie_key, None)
+    if handle is not None:
+        handle.cancel()
         logger.debug("Cancelled grouping timer for '%s'.", movie_key)
 
     # ── 7. Schedule post/edit after GROUP_WAIT_SECONDS ───────────────────────
-    task = asyncio.create_task(
-        _delayed_post(client, movie_key, deep_link, doc["qualities"], poster_url, doc)
+    _pending_handles[movie_key] = asyncio.get_running_loop().call_later(
+        settings.GROUP_WAIT_SECONDS, _fire_post, client, movie_key
     )
-    _pending_timers[movie_key] = task
 
 
-async def _delayed_post(
-    client: Client,
-    movie_key: str,
-    deep_link: str,
-    qualities: list,
-    poster_url: str,
-    doc: dict,
-) -> None:
+def _fire_post(client: Client, movie_key: str) -> None:
+    """Timer callback: the grouping window closed, start the post task."""
+    _pending_handles.pop(movie_key, None)
+    task = asyncio.create_task(_flush_and_post(client, movie_key))
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+
+
+async def _flush_and_post(client: Client, movie_key: str) -> None:
     """
-    Wait GROUP_WAIT_SECONDS, then post or edit the DEST_CHANNEL message.
+    Runs GROUP_WAIT_SECONDS after the last file for this movie: flush the
+    buffered upserts, then post or edit the DEST_CHANNEL message.
     This allows multiple qualities uploaded in quick succession to be
     grouped into a single post.
     """
+    # Write every quality gathered during the window in one round-trip
+    ops = _pending_ops.pop(movie_key, [])
     try:
-        await asyncio.sleep(settings.GROUP_WAIT_SECONDS)
-    except asyncio.CancelledError:
-        # Another file arrived; the new task will handle posting
+        await Database.bulk_upsert(ops)
+    except Exception as exc:
+        attempt = _flush_attempts.get(movie_key, 0) + 1
+        if not isinstance(exc, ConnectionFailure) or attempt > FLUSH_MAX_RETRIES:
+            # Not transient (duplicate key, validation …) or out of retries
+            logger.exception(
+                "Bulk upsert failed for '%s' (attempt %s), dropping %s op(s).",
+                movie_key, attempt, len(ops),
+            )
+            _flush_attempts.pop(movie_key, None)
+            _pending_heads.pop(movie_key, None)
+            return
+        logger.warning(
+            "Bulk upsert failed for '%s' (attempt %s/%s), retrying in %ss: %s",
+            movie_key, attempt, FLUSH_MAX_RETRIES, settings.GROUP_WAIT_SECONDS, exc,
+        )
+        _flush_attempts[movie_key] = attempt
+        # Put the batch back ahead of anything queued meanwhile and retry
+        # unless a newer file already re-armed the timer
+        _pending_ops[movie_key] = ops + _pending_ops.get(movie_key, [])
+        if movie_key not in _pending_handles:
+            _pending_handles[movie_key] = asyncio.get_running_loop().call_later(
+                settings.GROUP_WAIT_SECONDS, _fire_post, client, movie_key
+            )
         return
-    finally:
-        _pending_timers.pop(movie_key, None)
-
-    # Re-fetch latest doc in case more qualities arrived during sleep
-    fresh_doc = await Database.get_movie(movie_key)
+    _flush_attempts.pop(movie_key, None)
+    # The doc is in Mongo now, so later files can find their group_id there
+    _pending_heads.pop(movie_key, None)
+    if ops:
+        _invalidate_movie(movie_key)
+
+    # Re-fetch latest doc with every quality gathered during the window
+    fresh_doc = await Database.get_movie_for_caption(movie_key)
     if not fresh_doc:
         return
 
@@ -203,10 +331,19 @@ async def _delayed_post(
         # Send new post
         new_msg_id = await _send_post(client, poster_url, caption)
         if new_msg_id:
-            await Database.movies.update_one(
-                {"movie_key": movie_key},
-                {"$set": {"dest_message_id": new_msg_id}},
-            )
+            queued = _pending_ops.get(movie_key)
+            if queued:
+                # More files arrived while sending — ride along with their
+                # bulk flush, which runs before the next re-read of this movie
+                queued.append(
+                    UpdateOne(
+                        {"movie_key": movie_key},
+                        {"$set": {"dest_message_id": new_msg_id}},
+                    )
+                )
+            else:
+                await Database.set_dest_message_id(movie_key, new_msg_id)
+            _invalidate_movie(movie_key)
 
 
 async def _send_post(client: Client, poster_url: str, caption: str) -> Optional[int]:
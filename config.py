@@ -4,9 +4,12 @@ Copy .env.example → .env and fill in your values before starting.
 """
 import os
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List
 
 
+# Environment is read once per key; later Config() constructions reuse it.
+@lru_cache(maxsize=None)
 def _required(key: str) -> str:
     value = os.environ.get(key, "").strip()
     if not value:
@@ -17,10 +20,12 @@ def _required(key: str) -> str:
     return value
 
 
+@lru_cache(maxsize=None)
 def _optional(key: str, default: str = "") -> str:
     return os.environ.get(key, default).strip()
 
 
+@lru_cache(maxsize=None)
 def _int(key: str, default: int) -> int:
     try:
         return int(os.environ.get(key, str(default)))
@@ -28,7 +33,7 @@ def _int(key: str, default: int) -> int:
         return default
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     # ── Telegram ───────────────────────────────────────────────────────────────
     API_ID: int             = field(default_factory=lambda: int(_required("API_ID")))
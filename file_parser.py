@@ -13,7 +13,7 @@ from __future__ import annotations
 import re
 import unicodedata
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 
 # ── Constants ──────────────────────────────────────────────────────────────────
@@ -79,10 +79,6 @@ AUDIO_FORMAT_PATTERNS = [
     (r"e-ac-3|eac3", "EAC-3"),
 ]
 
-AUDIO_BITRATE_RE = re.compile(
-    r"(\d{2,4})\s*kbps", re.IGNORECASE
-)
-
 LANGUAGE_MAP = {
     "tamil": "Tamil",
     "tam": "Tamil",
@@ -112,6 +108,68 @@ LANGUAGE_MAP = {
     "portuguese": "Portuguese",
 }
 
+
+def _group(name: str, tokens) -> str:
+    """Named alternation of literal *tokens*, longest token first."""
+    ordered = sorted(tokens, key=len, reverse=True)
+    return f"(?P<{name}>" + "|".join(re.escape(t) for t in ordered) + ")"
+
+
+# Every technical token in one pattern so a filename is walked exactly once.
+# Each alternative is its own top-level named group → dispatch on m.lastgroup.
+_MASTER_RE = re.compile(
+    "|".join(
+        [
+            r"(?P<bitrate>(?P<kbps>\d{2,4})\s*kbps)",
+            r"\b(?P<year>19\d{2}|20\d{2})\b",
+            r"\b" + _group("res", [label for _, label in RESOLUTION_PATTERNS]) + r"\b",
+            r"\b" + _group("quality", QUALITY_MAP) + r"\b",
+            r"\b" + _group("codec", CODEC_MAP) + r"\b",
+            r"\b" + _group("lang", LANGUAGE_MAP) + r"\b",
+            r"\b(?P<esub>esub)\b",
+            # Zero-width lookaheads: audio patterns may overlap the tokens that
+            # follow them ('dts hdcam', 'eac3') and brackets must still be
+            # scanned inside.  An audio pattern starting *inside* a token that
+            # was already consumed is not seen: 'HDTS' is read as the quality
+            # tag only, never as DTS-HD audio (intended - it is a telesync tag).
+            *(f"(?=(?P<audio{i}>{pattern}))" for i, (pattern, _) in enumerate(AUDIO_FORMAT_PATTERNS)),
+            # 'DD5 1' / 'DDP' carry no field of their own but still end a yearless title
+            r"(?=\b(?P<cut>dd5|ddp)\b)",
+            r"(?=[\[\(](?P<bracket>[^\]\)]+)[\]\)])",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+# Earlier entries in each map win, as with the old one-pattern-at-a-time loops
+_RESOLUTION_RANK = {label.lower(): (i, label) for i, (_, label) in enumerate(RESOLUTION_PATTERNS)}
+_QUALITY_RANK = {token: (i, label) for i, (token, label) in enumerate(QUALITY_MAP.items())}
+_CODEC_RANK = {token: (i, label) for i, (token, label) in enumerate(CODEC_MAP.items())}
+
+# Dots that act as word separators (not inside [..] and not before a year)
+_NORM_DOT_RE = re.compile(r"(?<!\[)\.(?!\d{4}[\.\s\]])(?!\w+\])")
+
+# Title clean-up
+_MULTI_SPACE_RE = re.compile(r"\s{2,}")
+_BRACKET_CHARS_RE = re.compile(r"[\[\(\{\]\)\}]+")
+_DASH_RUN_RE = re.compile(r"[-_]{2,}")
+
+# Separators inside a bracketed language block  [Tamil + Telugu - Hindi]
+_LANG_SPLIT_RE = re.compile(r"[\+\-,&/|]|\s+")
+
+# Whole-word tokens that mark the end of the title when no year is present.
+# Only tried at _MASTER_RE match offsets, so it never adds a pass of its own.
+_TECHNICAL_RE = re.compile(
+    r"\b("
+    r"bluray|blu-ray|bdrip|brrip|webrip|webdl|web-dl|hdrip|dvdrip|"
+    r"x264|x265|hevc|h264|h265|"
+    r"480p|720p|1080p|2160p|"
+    r"aac|dd5|ddp|dts|mp3|"
+    r"esub"
+    r")\b",
+    re.IGNORECASE,
+)
+
 # Junk tags to strip from title
 JUNK_TAGS = re.compile(
     r"\b("
@@ -145,6 +203,26 @@ class MovieMeta:
     # Populated from message.caption in channel_post.py.
     file_caption: str = ""
 
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "MovieMeta":
+        """Reconstruct a MovieMeta from a quality dict stored in MongoDB."""
+        return cls(
+            raw_filename=doc.get("raw_filename", ""),
+            title=doc.get("title", ""),
+            year=doc.get("year"),
+            quality=doc.get("quality", ""),
+            resolution=doc.get("resolution", ""),
+            codec=doc.get("codec", ""),
+            audio_langs=doc.get("audio_langs", []),
+            audio_format=doc.get("audio_format", ""),
+            audio_bitrate=doc.get("audio_bitrate", ""),
+            file_size_bytes=doc.get("file_size_bytes", 0),
+            has_esub=doc.get("has_esub", False),
+            extension=doc.get("extension", "mkv"),
+            # ↓ The actual caption the uploader typed — the most important field now
+            file_caption=doc.get("file_caption", ""),
+        )
+
     # Derived
     @property
     def file_size_human(self) -> str:
@@ -219,17 +297,17 @@ def parse_filename(filename: str, file_size_bytes: int = 0) -> MovieMeta:
     # Normalise separators
     normalised = _normalise(name)
 
-    # ESub detection
-    meta.has_esub = bool(re.search(r"\besub\b", normalised, re.IGNORECASE))
-
-    # ── Extraction order matters ───────────────────────────────────────────────
-    meta.resolution  = _extract_resolution(normalised)
-    meta.quality     = _extract_quality(normalised)
-    meta.codec       = _extract_codec(normalised)
-    meta.audio_format, meta.audio_bitrate = _extract_audio_format(normalised)
-    meta.audio_langs = _extract_languages(normalised)
-    meta.year        = _extract_year(normalised)
-    meta.title       = _extract_title(normalised, meta.year)
+    # ── Single pass over the string collects every technical field ────────────
+    tokens = _scan(normalised)
+    meta.has_esub      = tokens["has_esub"]
+    meta.resolution    = tokens["resolution"]
+    meta.quality       = tokens["quality"]
+    meta.codec         = tokens["codec"]
+    meta.audio_format  = tokens["audio_format"]
+    meta.audio_bitrate = tokens["audio_bitrate"]
+    meta.audio_langs   = tokens["audio_langs"]
+    meta.year          = tokens["year"]
+    meta.title         = _extract_title(normalised, meta.year, tokens["cut"])
 
     return meta
 
@@ -239,74 +317,100 @@ def parse_filename(filename: str, file_size_bytes: int = 0) -> MovieMeta:
 def _normalise(s: str) -> str:
     """Replace dots/underscores (not inside brackets) with spaces."""
     # Preserve content inside [ ] and ( ) as-is, normalise outside
-    s = unicodedata.normalize("NFKD", s)
-    s = re.sub(r"(?<!\[)\.(?!\d{4}[\.\s\]])(?!\w+\])", " ", s)
+    if not s.isascii():                       # NFKD is a no-op on ASCII
+        s = unicodedata.normalize("NFKD", s)
+    s = _NORM_DOT_RE.sub(" ", s)
     s = s.replace("_", " ")
     return s
 
 
-def _extract_year(s: str) -> Optional[int]:
-    # Look for 4-digit year between 1900-2099
-    matches = re.findall(r"\b(19\d{2}|20\d{2})\b", s)
-    return int(matches[-1]) if matches else None
-
-
-def _extract_resolution(s: str) -> str:
-    for pattern, label in RESOLUTION_PATTERNS:
-        if re.search(pattern, s, re.IGNORECASE):
-            return label
-    return ""
-
+def _scan(s: str) -> dict:
+    """
+    Walk *s* once with _MASTER_RE and collect every technical field.
+    'cut' is the offset of the first technical token (-1 if none),
+    used to end the title when the filename carries no year.
+    """
+    ranked: dict = {}
+    audio_rank = len(AUDIO_FORMAT_PATTERNS)
+    bitrate = ""
+    year: Optional[int] = None
+    bracket: Optional[str] = None
+    scanned_langs: List[str] = []
+    seen_langs: set = set()
+    has_esub = False
+    cut = -1
+
+    for m in _MASTER_RE.finditer(s):
+        kind = m.lastgroup
+        text = m.group(kind).lower()
+        if kind == "year":
+            year = int(text)          # last year in the name wins
+            continue
+        if kind == "bitrate":
+            if not bitrate:
+                bitrate = f"{m.group('kbps')}Kbps"
+            continue
+        if kind == "bracket":
+            if bracket is None:
+                bracket = m.group(kind)
+            continue
+        if kind == "lang":
+            label = LANGUAGE_MAP[text]
+            if label not in seen_langs:
+                seen_langs.add(label)
+                scanned_langs.append(label)
+            continue
+
+        if kind == "esub":
+            has_esub = True
+        elif kind == "cut":
+            pass
+        elif kind == "res":
+            _keep_best(ranked, kind, _RESOLUTION_RANK[text])
+        elif kind == "quality":
+            _keep_best(ranked, kind, _QUALITY_RANK[text])
+        elif kind == "codec":
+            _keep_best(ranked, kind, _CODEC_RANK[text])
+        else:
+            audio_rank = min(audio_rank, int(kind[5:]))
 
-def _extract_quality(s: str) -> str:
-    for token, label in QUALITY_MAP.items():
-        if re.search(r"\b" + re.escape(token) + r"\b", s, re.IGNORECASE):
-            return label
-    return ""
+        if cut == -1 and _TECHNICAL_RE.match(s, m.start()):
+            cut = m.start()
 
+    # A bracketed language block  [Tamil + Telugu + Hindi]  beats a loose scan
+    langs = _bracket_languages(bracket) if bracket else []
 
-def _extract_codec(s: str) -> str:
-    for token, label in CODEC_MAP.items():
-        if re.search(r"\b" + re.escape(token) + r"\b", s, re.IGNORECASE):
-            return label
-    return ""
+    return {
+        "resolution":    ranked.get("res", (0, ""))[1],
+        "quality":       ranked.get("quality", (0, ""))[1],
+        "codec":         ranked.get("codec", (0, ""))[1],
+        "audio_format":  AUDIO_FORMAT_PATTERNS[audio_rank][1] if audio_rank < len(AUDIO_FORMAT_PATTERNS) else "",
+        "audio_bitrate": bitrate,
+        "audio_langs":   langs or scanned_langs,
+        "year":          year,
+        "has_esub":      has_esub,
+        "cut":           cut,
+    }
 
 
-def _extract_audio_format(s: str) -> tuple[str, str]:
-    fmt = ""
-    for pattern, label in AUDIO_FORMAT_PATTERNS:
-        if re.search(pattern, s, re.IGNORECASE):
-            fmt = label
-            break
-    br_match = AUDIO_BITRATE_RE.search(s)
-    br = f"{br_match.group(1)}Kbps" if br_match else ""
-    return fmt, br
+def _keep_best(ranked: dict, kind: str, candidate: tuple) -> None:
+    current = ranked.get(kind)
+    if current is None or candidate[0] < current[0]:
+        ranked[kind] = candidate
 
 
-def _extract_languages(s: str) -> List[str]:
-    # First try to find a bracketed language block  [Tamil + Telugu + Hindi]
-    bracket_match = re.search(r"[\[\(]([^\]\)]+)[\]\)]", s)
+def _bracket_languages(block: str) -> List[str]:
     found: List[str] = []
-    if bracket_match:
-        block = bracket_match.group(1)
-        langs = re.split(r"[\+\-,&/|]|\s+", block)
-        for lang in langs:
-            lang = lang.strip()
-            mapped = LANGUAGE_MAP.get(lang.lower())
-            if mapped and mapped not in found:
-                found.append(mapped)
-
-    # Fall back to scanning whole string
-    if not found:
-        for token, label in LANGUAGE_MAP.items():
-            if re.search(r"\b" + re.escape(token) + r"\b", s, re.IGNORECASE):
-                if label not in found:
-                    found.append(label)
-
+    seen: set = set()
+    for lang in _LANG_SPLIT_RE.split(block):
+        mapped = LANGUAGE_MAP.get(lang.strip().lower())
+        if mapped and mapped not in seen:
+            seen.add(mapped)
+            found.append(mapped)
     return found
 
 
-def _extract_title(s: str, year: Optional[int]) -> str:
+def _extract_title(s: str, year: Optional[int], cut: int = -1) -> str:
     """
     Everything before the year (or first quality/codec/resolution token) is the title.
     """
@@ -320,19 +424,8 @@ def _extract_title(s: str, year: Optional[int]) -> str:
                 return title
 
     # Cut at first technical token
-    technical_re = re.compile(
-        r"\b("
-        r"bluray|blu-ray|bdrip|brrip|webrip|webdl|web-dl|hdrip|dvdrip|"
-        r"x264|x265|hevc|h264|h265|"
-        r"480p|720p|1080p|2160p|"
-        r"aac|dd5|ddp|dts|mp3|"
-        r"esub"
-        r")\b",
-        re.IGNORECASE,
-    )
-    m = technical_re.search(s)
-    if m:
-        title = s[: m.start()].strip()
+    if cut != -1:
+        title = s[:cut].strip()
         title = _clean_title(title)
         if title:
             return title
@@ -342,18 +435,22 @@ def _extract_title(s: str, year: Optional[int]) -> str:
 
 def _clean_title(s: str) -> str:
     s = JUNK_TAGS.sub("", s)
-    s = re.sub(r"\s{2,}", " ", s)
-    s = re.sub(r"[\[\(\{\]\)\}]+", "", s)
-    s = re.sub(r"[-_]{2,}", "", s)
+    s = _MULTI_SPACE_RE.sub(" ", s)
+    s = _BRACKET_CHARS_RE.sub("", s)
+    s = _DASH_RUN_RE.sub("", s)
     s = s.strip(" -_.,|:")
     return s.title()
 
 
+# (unit, format spec) indexed by power of 1024
+_SIZE_UNITS = (
+    ("B", ".1f"), ("KB", ".1f"), ("MB", ".2f"), ("GB", ".2f"), ("TB", ".1f"), ("PB", ".2f"),
+)
+
+
 def _human_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return ""
-    for unit in ("B", "KB", "MB", "GB", "TB"):
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f}{unit}" if unit != "MB" and unit != "GB" else f"{size_bytes:.2f}{unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.2f}PB"
+    idx = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    unit, spec = _SIZE_UNITS[idx]
+    return f"{size_bytes / (1 << (idx * 10)):{spec}}{unit}"
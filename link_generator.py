@@ -19,12 +19,11 @@ def generate_group_id(movie_key: str) -> str:
     timestamp so two uploads of the same movie at different times get
     different IDs (unless deliberately re-used).
 
-    Format: first 12 chars of SHA-256(movie_key + timestamp_ms)
+    Format: 12 hex chars of BLAKE2b(movie_key + timestamp_ns, digest_size=6)
     Short enough for a Telegram start parameter.
     """
     seed = f"{movie_key}:{time.time_ns()}"
-    digest = hashlib.sha256(seed.encode()).hexdigest()
-    return digest[:12]
+    return hashlib.blake2b(seed.encode(), digest_size=6).hexdigest()
 
 
 def build_deep_link(group_id: str) -> str:
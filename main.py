@@ -6,6 +6,7 @@ import logging
 
 from bot.client import app
 from bot.database.mongo import Database
+from bot.utils.tmdb import tmdb
 from bot import handlers  # noqa: F401 — registers all handlers
 
 logging.basicConfig(
@@ -19,10 +20,14 @@ logger = logging.getLogger(__name__)
 async def main() -> None:
     await Database.connect()
     logger.info("MongoDB connected successfully.")
+    await tmdb.start()
 
-    async with app:
-        logger.info("Movie Auto Post Bot is running …")
-        await asyncio.Event().wait()          # keep running until SIGINT/SIGTERM
+    try:
+        async with app:
+            logger.info("Movie Auto Post Bot is running …")
+            await asyncio.Event().wait()      # keep running until SIGINT/SIGTERM
+    finally:
+        await tmdb.close()
 
 
 if __name__ == "__main__":
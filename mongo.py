@@ -5,6 +5,7 @@ Collections
 ───────────
 movies      — one document per unique movie (keyed on normalised title + year)
 pending     — temporary staging area while we wait to group qualities
+tmdb_cache  — TMDB search results per normalised title + year (expire after a week)
 """
 from __future__ import annotations
 
@@ -12,8 +13,10 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import motor.motor_asyncio
-from pymongo import ASCENDING, IndexModel, ReturnDocument
+from pymongo import ASCENDING, AsyncMongoClient, IndexModel, ReturnDocument, UpdateOne
+from pymongo.write_concern import WriteConcern
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
 
 from config import settings
 
@@ -21,26 +24,36 @@ logger = logging.getLogger(__name__)
 
 
 class Database:
-    _client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
-    _db: Optional[motor.motor_asyncio.AsyncIOMotorDatabase] = None
+    _client: Optional[AsyncMongoClient] = None
+    _db: Optional[AsyncDatabase] = None
+
+    # Collection shorthands — bound once in connect()
+    movies: Optional[AsyncCollection] = None
+    pending: Optional[AsyncCollection] = None
+    tmdb_cache: Optional[AsyncCollection] = None
+
+    TMDB_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
 
     # ── Lifecycle ──────────────────────────────────────────────────────────────
 
     @classmethod
     async def connect(cls) -> None:
-        cls._client = motor.motor_asyncio.AsyncIOMotorClient(
+        cls._client = AsyncMongoClient(
             settings.MONGO_URI,
             serverSelectionTimeoutMS=10_000,
         )
         cls._db = cls._client[settings.DB_NAME]
+        cls.movies = cls._db["movies"]
+        cls.pending = cls._db["pending"]
+        cls.tmdb_cache = cls._db["tmdb_cache"]
         await cls._ensure_indexes()
-        logger.info("Motor connected to MongoDB database '%s'.", settings.DB_NAME)
+        logger.info("Connected to MongoDB database '%s'.", settings.DB_NAME)
 
     @classmethod
     async def disconnect(cls) -> None:
         if cls._client:
-            cls._client.close()
-            logger.info("Motor disconnected.")
+            await cls._client.close()
+            logger.info("Disconnected from MongoDB.")
 
     @classmethod
     async def _ensure_indexes(cls) -> None:
@@ -58,18 +71,14 @@ class Database:
                 IndexModel([("created_at", ASCENDING)]),
             ]
         )
-
-    # ── Shorthand properties ───────────────────────────────────────────────────
-
-    @classmethod
-    @property
-    def movies(cls) -> motor.motor_asyncio.AsyncIOMotorCollection:
-        return cls._db["movies"]
-
-    @classmethod
-    @property
-    def pending(cls) -> motor.motor_asyncio.AsyncIOMotorCollection:
-        return cls._db["pending"]
+        await cls.tmdb_cache.create_indexes(
+            [
+                IndexModel(
+                    [("synced_at", ASCENDING)],
+                    expireAfterSeconds=cls.TMDB_CACHE_TTL_SECONDS,
+                ),
+            ]
+        )
 
     # ── Movie helpers ──────────────────────────────────────────────────────────
 
@@ -77,6 +86,36 @@ class Database:
     async def get_movie(cls, movie_key: str) -> Optional[Dict[str, Any]]:
         return await cls.movies.find_one({"movie_key": movie_key})
 
+    # Only what build_caption_from_docs() and the post/edit step read —
+    # file ids and raw filenames stay on the server.
+    CAPTION_PROJECTION = {
+        "title": 1,
+        "year": 1,
+        "group_id": 1,
+        "poster_url": 1,
+        "dest_message_id": 1,
+        "qualities.title": 1,
+        "qualities.year": 1,
+        "qualities.quality": 1,
+        "qualities.resolution": 1,
+        "qualities.codec": 1,
+        "qualities.audio_langs": 1,
+        "qualities.audio_format": 1,
+        "qualities.audio_bitrate": 1,
+        "qualities.file_size_bytes": 1,
+        "qualities.has_esub": 1,
+        "qualities.extension": 1,
+        "qualities.file_caption": 1,
+        "qualities.rendered_line": 1,
+    }
+
+    @classmethod
+    async def get_movie_for_caption(cls, movie_key: str) -> Optional[Dict[str, Any]]:
+        """get_movie() trimmed to the fields needed to render the post."""
+        return await cls.movies.find_one(
+            {"movie_key": movie_key}, projection=cls.CAPTION_PROJECTION
+        )
+
     @classmethod
     async def upsert_movie(
         cls,
@@ -94,6 +133,57 @@ class Database:
         (deduplication by file_unique_id).
         Returns the updated document.
         """
+        update = cls._movie_update(
+            movie_key, title, year, group_id, new_quality, dest_message_id, poster_url
+        )
+        doc = await cls.movies.find_one_and_update(
+            {"movie_key": movie_key},
+            update,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc
+
+    @classmethod
+    def upsert_movie_op(
+        cls,
+        movie_key: str,
+        title: str,
+        year: Optional[int],
+        group_id: str,
+        new_quality: Dict[str, Any],
+        dest_message_id: Optional[int] = None,
+        poster_url: Optional[str] = None,
+    ) -> UpdateOne:
+        """
+        Same update as upsert_movie(), returned as an UpdateOne so several
+        files for one movie can be flushed together with bulk_upsert().
+        """
+        update = cls._movie_update(
+            movie_key, title, year, group_id, new_quality, dest_message_id, poster_url
+        )
+        return UpdateOne({"movie_key": movie_key}, update, upsert=True)
+
+    @classmethod
+    async def bulk_upsert(cls, ops: List[UpdateOne]) -> None:
+        """
+        Apply buffered movie upserts in a single round-trip.
+        Ordered, because every op targets the same document and the first
+        one may be the insert.
+        """
+        if ops:
+            await cls.movies.bulk_write(ops, ordered=True)
+
+    @staticmethod
+    def _movie_update(
+        movie_key: str,
+        title: str,
+        year: Optional[int],
+        group_id: str,
+        new_quality: Dict[str, Any],
+        dest_message_id: Optional[int],
+        poster_url: Optional[str],
+    ) -> Dict[str, Any]:
         now = datetime.now(timezone.utc)
 
         update: Dict[str, Any] = {
@@ -115,19 +205,51 @@ class Database:
             update["$set"]["dest_message_id"] = dest_message_id
         if poster_url:
             update["$set"]["poster_url"] = poster_url
+        return update
 
-        doc = await cls.movies.find_one_and_update(
+    @classmethod
+    async def set_dest_message_id(cls, movie_key: str, message_id: int) -> None:
+        """
+        Record the DEST_CHANNEL post id.  Primary ack only, no journal wait:
+        losing this write just means the next upload posts afresh.
+        """
+        movies = cls.movies.with_options(write_concern=WriteConcern(w=1, j=False))
+        await movies.update_one(
             {"movie_key": movie_key},
-            update,
-            upsert=True,
-            return_document=ReturnDocument.AFTER,
+            {"$set": {"dest_message_id": message_id}},
         )
-        return doc
 
     @classmethod
     async def get_by_group_id(cls, group_id: str) -> Optional[Dict[str, Any]]:
         return await cls.movies.find_one({"group_id": group_id})
 
+    # ── TMDB cache helpers ─────────────────────────────────────────────────────
+
+    @classmethod
+    async def get_tmdb_cache(cls, key: str) -> Optional[Dict[str, Any]]:
+        return await cls.tmdb_cache.find_one({"_id": key})
+
+    @classmethod
+    async def set_tmdb_cache(
+        cls,
+        key: str,
+        poster_url: str,
+        overview: Optional[str],
+        tmdb_id: Optional[str],
+    ) -> None:
+        await cls.tmdb_cache.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "poster_url": poster_url,
+                    "overview": overview,
+                    "tmdb_id": tmdb_id,
+                    "synced_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+
     # ── Pending (grouping buffer) helpers ──────────────────────────────────────
 
     @classmethod
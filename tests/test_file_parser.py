@@ -0,0 +1,41 @@
+"""
+Regression tests for the single-pass scan in file_parser.
+
+Expected titles are what the old one-regex-per-field parser produced, so a
+change here means the fused _MASTER_RE walk cuts titles differently.
+"""
+
+import pytest
+
+from file_parser import parse_filename
+
+
+# Yearless names: the title ends at the first whole-word technical token
+@pytest.mark.parametrize(
+    "filename, title",
+    [
+        ("Kaithi.DD5.1.Tamil.mkv", "Kaithi"),
+        ("Jawan.Hindi.DDP.5.1.x264.mkv", "Jawan Hindi"),
+        ("Vikram DDP Tamil.mkv", "Vikram"),
+        ("Leo.Tamil.HDRip.x264.AAC.mkv", "Leo Tamil"),
+        # Tokens buried inside a word must not cut the title
+        ("Korean_Amp3d_360p.mkv", "Korean Amp3D 360P"),
+        ("Amp3d.Story.720p.mkv", "Amp3D Story"),
+        ("Dtsx.Adventure.1080p.mkv", "Dtsx Adventure"),
+    ],
+)
+def test_yearless_title_cut(filename, title):
+    assert parse_filename(filename).title == title
+
+
+def test_audio_overlaps_following_token():
+    # 'dts HD..' reads as DTS-HD, and HDCAM must still be seen as the quality
+    meta = parse_filename("Leo.2023.dts.HDCAM.mkv")
+    assert meta.audio_format == "DTS-HD MA"
+    assert meta.quality == "HDCAM"
+
+
+def test_hdts_is_quality_not_dts_hd_audio():
+    meta = parse_filename("Leo.2023.HDTS.mkv")
+    assert meta.quality == "HDTS"
+    assert meta.audio_format == ""
@@ -3,14 +3,21 @@ bot/utils/tmdb.py
 
 Fetches movie poster and metadata from The Movie Database (TMDB) API.
 Uses aiohttp for fully async HTTP calls.
+Search results are cached in MongoDB (tmdb_cache) for a week.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional, Tuple
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
 
 import aiohttp
+import orjson
 
+from bot.database.mongo import Database
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -18,17 +25,54 @@ logger = logging.getLogger(__name__)
 TMDB_BASE        = "https://api.themoviedb.org/3"
 TMDB_IMAGE_BASE  = "https://image.tmdb.org/t/p/w500"
 
+# TMDB allows ~40 requests per 10 seconds per IP and 20 connections
+TMDB_RATE_LIMIT  = 40
+TMDB_RATE_PERIOD = 10.0
+TMDB_MAX_CONNECTIONS = 20
+# Retries on 429 / 5xx, waiting Retry-After or 1s, 2s, 4s …
+TMDB_MAX_RETRIES = 3
+# A longer Retry-After is not worth stalling a post for — use the fallback
+TMDB_MAX_RETRY_DELAY = 8.0
+
+# Settings never change at runtime — bind them once
+_DEFAULT_PARAMS = {"api_key": settings.TMDB_API_KEY, "language": settings.TMDB_LANGUAGE}
+_FALLBACK = settings.FALLBACK_POSTER
+
+SearchResult = Tuple[Optional[str], Optional[str], Optional[str]]
+
 
 class TMDBClient:
     """Thin async wrapper around TMDB search/details endpoints."""
 
     def __init__(self) -> None:
         self._session: Optional[aiohttp.ClientSession] = None
+        # (title.casefold(), year) → result, least recently used first
+        self._cache: OrderedDict[tuple, SearchResult] = OrderedDict()
+        self._cache_max = 1024
+        # Searches currently on the wire, shared by concurrent callers
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        # Token bucket pacing outgoing requests to TMDB_RATE_LIMIT/period
+        self._tokens = float(TMDB_RATE_LIMIT)
+        self._last_refill = time.monotonic()
+        self._bucket_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Open the HTTP session up front so the first lookup doesn't pay for it."""
+        await self._get_session()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=15)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            # Keep-alive pool with cached DNS so repeat lookups skip the
+            # TCP/TLS handshake
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=TMDB_MAX_CONNECTIONS,
+                ttl_dns_cache=300,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(timeout=timeout, connector=connector)
         return self._session
 
     async def close(self) -> None:
@@ -37,25 +81,139 @@ class TMDBClient:
 
     async def _get(self, path: str, **params) -> Optional[dict]:
         session = await self._get_session()
-        params["api_key"]  = settings.TMDB_API_KEY
-        params["language"] = settings.TMDB_LANGUAGE
+        params = {**params, **_DEFAULT_PARAMS}
         url = f"{TMDB_BASE}{path}"
-        try:
-            async with session.get(url, params=params) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                logger.warning("TMDB %s → HTTP %s", path, resp.status)
-        except aiohttp.ClientError as exc:
-            logger.error("TMDB request error: %s", exc)
+        for attempt in range(TMDB_MAX_RETRIES + 1):
+            await self._acquire_token()
+            try:
+                async with session.get(url, params=params) as resp:
+                    if resp.status == 200:
+                        return await resp.json(loads=orjson.loads)
+                    if resp.status != 429 and resp.status < 500:
+                        logger.warning("TMDB %s → HTTP %s", path, resp.status)
+                        return None
+                    delay = _retry_delay(resp.headers.get("Retry-After"), attempt)
+            except aiohttp.ClientError as exc:
+                logger.error("TMDB request error: %s", exc)
+                return None
+
+            if attempt == TMDB_MAX_RETRIES:
+                logger.warning("TMDB %s → HTTP %s, giving up.", path, resp.status)
+                break
+            if delay > TMDB_MAX_RETRY_DELAY:
+                logger.warning(
+                    "TMDB %s → HTTP %s, Retry-After %.1fs too long, giving up.",
+                    path, resp.status, delay,
+                )
+                break
+            logger.warning(
+                "TMDB %s → HTTP %s, retrying in %.1fs.", path, resp.status, delay
+            )
+            await asyncio.sleep(delay)
         return None
 
+    async def _acquire_token(self) -> None:
+        """Wait until the token bucket allows another request."""
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                refill = (now - self._last_refill) * TMDB_RATE_LIMIT / TMDB_RATE_PERIOD
+                self._tokens = min(float(TMDB_RATE_LIMIT), self._tokens + refill)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * TMDB_RATE_PERIOD / TMDB_RATE_LIMIT)
+
+    async def search_movie_cached(
+        self, title: str, year: Optional[int] = None
+    ) -> SearchResult:
+        """
+        search_movie() backed by the in-process LRU and then by the
+        tmdb_cache collection, so results survive restarts.
+        Only real matches are stored; a miss (fallback poster) is retried
+        on the next call in case TMDB was just unavailable.
+        """
+        hit = self._cache_get((title.casefold(), year))
+        if hit is not None:
+            return hit
+
+        key = f"{title.lower().strip()}_{year or ''}"
+        cached = await Database.get_tmdb_cache(key)
+        if cached and _is_fresh(cached.get("synced_at")):
+            result = (cached["poster_url"], cached.get("overview"), cached.get("tmdb_id"))
+            self._cache_put((title.casefold(), year), result)
+            return result
+
+        poster_url, overview, tmdb_id = await self.search_movie(title, year)
+        if tmdb_id is not None:
+            await Database.set_tmdb_cache(key, poster_url, overview, tmdb_id)
+        return poster_url, overview, tmdb_id
+
+    async def search_many(
+        self, queries: Iterable[Tuple[str, Optional[int]]]
+    ) -> List[SearchResult]:
+        """
+        Look up several (title, year) pairs concurrently, e.g. for batch
+        imports.  Results come back in query order; the token bucket keeps
+        the burst within TMDB's rate limit.
+        """
+        return list(
+            await asyncio.gather(*(self.search_movie_cached(t, y) for t, y in queries))
+        )
+
     async def search_movie(
         self, title: str, year: Optional[int] = None
-    ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    ) -> SearchResult:
         """
         Returns (poster_url, overview, tmdb_id) for the best match.
         Falls back to settings.FALLBACK_POSTER if nothing found.
+        Matches are kept in an in-process LRU, and concurrent calls for the
+        same title/year share a single HTTP request.
         """
+        key = (title.casefold(), year)
+        hit = self._cache_get(key)
+        if hit is not None:
+            return hit
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # shield: a cancelled waiter must not cancel the shared lookup
+            return await asyncio.shield(inflight)
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            result = await self._search_movie(title, year)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as exc:
+            fut.set_exception(exc)
+            fut.exception()          # mark retrieved when nobody was waiting
+            raise
+        else:
+            fut.set_result(result)
+            if result[2] is not None:
+                self._cache_put(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def _cache_get(self, key: tuple) -> Optional[SearchResult]:
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+        return result
+
+    def _cache_put(self, key: tuple, result: SearchResult) -> None:
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_max:
+            self._cache.popitem(last=False)
+
+    async def _search_movie(self, title: str, year: Optional[int]) -> SearchResult:
+        """Uncached TMDB /search/movie lookup."""
         params: dict = {"query": title, "include_adult": "false"}
         if year:
             params["year"] = year
@@ -63,26 +221,25 @@ class TMDBClient:
         data = await self._get("/search/movie", **params)
         if not data or not data.get("results"):
             logger.info("TMDB: no results for '%s' (%s). Using fallback.", title, year)
-            return settings.FALLBACK_POSTER, None, None
+            return _FALLBACK, None, None
 
         # Pick best match: prefer exact year match, else first result
         results = data["results"]
-        best = None
+        best = results[0]
         if year:
-            for r in results:
-                release = r.get("release_date", "")
-                if release.startswith(str(year)):
-                    best = r
-                    break
-        if best is None:
-            best = results[0]
+            prefix = str(year)
+            best = next(
+                (r for r in results if (r.get("release_date") or "").startswith(prefix)),
+                best,
+            )
 
         poster_path = best.get("poster_path")
         poster_url  = (
-            f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else settings.FALLBACK_POSTER
+            f"{TMDB_IMAGE_BASE}{poster_path}" if poster_path else _FALLBACK
         )
-        overview    = best.get("overview") or None
-        tmdb_id     = str(best.get("id")) if best.get("id") else None
+        overview    = best.get("overview") or None   # "" → None
+        _id         = best.get("id")
+        tmdb_id     = str(_id) if _id is not None else None
 
         logger.info(
             "TMDB: found '%s' (id=%s, poster=%s)",
@@ -93,5 +250,24 @@ class TMDBClient:
         return poster_url, overview, tmdb_id
 
 
+def _retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """Honour a numeric Retry-After header, else back off exponentially."""
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        return float(2 ** attempt)
+
+
+def _is_fresh(synced_at: Optional[datetime]) -> bool:
+    # The TTL index removes old entries lazily (about once a minute), so
+    # check the age here too.  PyMongo returns naive UTC datetimes by default.
+    if synced_at is None:
+        return False
+    if synced_at.tzinfo is None:
+        synced_at = synced_at.replace(tzinfo=timezone.utc)
+    age = datetime.now(timezone.utc) - synced_at
+    return age.total_seconds() < Database.TMDB_CACHE_TTL_SECONDS
+
+
 # Module-level singleton
 tmdb = TMDBClient()